@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+YAML config cache - parse each config file once, revalidate by stat
+PyYAML's pure-Python loader dominates module startup for our small config
+files, and several modules (re)read the same files. Cache parsed results
+keyed by path and validate with (mtime_ns, size) so an edited config is
+still picked up on the next load.
+"""
+
+import os
+import copy
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+
+import yaml
+
+# Prefer the libyaml C loader (~10x faster parse); fall back to the pure
+# Python SafeLoader and make the regression visible once at import time
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+    print("[_yaml_cache] ⚠ libyaml CSafeLoader unavailable, using pure-Python loader")
+
+_MAX_ENTRIES = 100
+
+_cache = OrderedDict()  # path -> (mtime_ns, size, parsed)
+_lock = threading.Lock()
+
+def _load_sidecar(path, key):
+    """Return data from path's .json sidecar if it matches the stat key.
+
+    The sidecar stores the source file's (mtime_ns, size) alongside the
+    parsed tree; json.load is ~10-20x faster than the YAML parse it skips.
+    """
+    try:
+        with open(path + '.json', 'r') as f:
+            sidecar = json.load(f)
+        if sidecar.get('key') == list(key):
+            return sidecar['data']
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+def _write_sidecar(path, key, parsed):
+    """Atomically persist the parsed tree next to its source file."""
+    try:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.json.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'key': list(key), 'data': parsed}, f)
+        os.replace(tmp, path + '.json')
+    except (OSError, TypeError, ValueError):
+        # Read-only config dir or non-JSON-able YAML - cache stays in-memory only
+        pass
+
+def load_yaml(path):
+    """Load a YAML file, reusing the parsed result while the file is unchanged.
+
+    Parsed results are kept in-memory for the process and persisted to a
+    .json sidecar so the next process start skips the YAML parse too.
+    Returns a deep copy so callers can mutate the result without
+    corrupting the cache.
+    """
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+
+    with _lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == key:
+            _cache.move_to_end(path)
+            return copy.deepcopy(entry[1])
+
+    parsed = _load_sidecar(path, key)
+    if parsed is None:
+        with open(path, 'r') as f:
+            parsed = yaml.load(f, Loader=_Loader)
+        _write_sidecar(path, key, parsed)
+
+    with _lock:
+        _cache[path] = (key, parsed)
+        _cache.move_to_end(path)
+        while len(_cache) > _MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+    return copy.deepcopy(parsed)
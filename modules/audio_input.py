@@ -125,8 +125,9 @@ class AudioInput:
         # CRITICAL: Read exactly self.chunk_samples (2000 @ 48kHz)
         indata, overflowed = self.wake_stream.read(self.chunk_samples)
         
-        # Convert to numpy array
-        audio_48k = np.frombuffer(indata, dtype=np.int16)
+        # InputStream.read already returns an int16 ndarray of shape
+        # (chunk_samples, 1) - take the mono column as a zero-copy view
+        audio_48k = indata[:, 0]
         
         # Check audio level
         vol = np.abs(audio_48k).mean()
@@ -200,7 +201,7 @@ class AudioInput:
             while total_chunks < max_chunks:
                 # Read chunk
                 chunk, overflowed = stream.read(chunk_samples)
-                audio_chunk = np.frombuffer(chunk, dtype=np.int16)
+                audio_chunk = chunk[:, 0]  # mono column view, no copy
                 
                 # Check voice activity
                 volume = np.abs(audio_chunk).mean()
@@ -247,7 +248,7 @@ class AudioInput:
         start = time.time()
         segments, _ = self.whisper.transcribe(audio_16k, beam_size=5, language="en")
         
-        text = " ".join([seg.text for seg in segments]).strip()
+        text = " ".join(seg.text for seg in segments).strip()
         elapsed = time.time() - start
         
         # Filter Whisper hallucinations (common false positives on silence)
@@ -12,6 +12,7 @@ import sounddevice as sd
 import numpy as np
 from scipy import signal as scipy_signal
 import yaml
+import os
 import time
 from datetime import datetime
 import io
@@ -56,15 +57,19 @@ class AudioInput:
         self.audio_buffer = deque(maxlen=self.buffer_samples)
         self.buffer_lock = Lock()
         
-        # Recording state for transcription mode
-        self.recording = False
-        self.recording_buffer = []
-        self.silence_start = None
-        
         # VAD settings
         self.SILENCE_THRESHOLD = 300
         self.SILENCE_DURATION = 2.5  # seconds
         self.MAX_RECORDING = 30  # seconds
+
+        # Recording state for transcription mode. Chunks are copied into a
+        # preallocated buffer as they arrive and the final take is a view -
+        # no list-of-chunks plus a ~3MB np.concatenate per utterance
+        self.recording = False
+        self.recording_max_samples = self.MAX_RECORDING * self.mic_rate
+        self.recording_buffer = np.empty(self.recording_max_samples, dtype=np.int16)
+        self.recording_filled = 0
+        self.silence_start = None
         
         # Models
         print("[AudioInput] Loading wake word detector...")
@@ -73,7 +78,8 @@ class AudioInput:
         print(f"[AudioInput] Wake word threshold: {self.wake_threshold}")
         
         print("[AudioInput] Loading Whisper...")
-        self.whisper = WhisperModel("tiny", device="cpu", compute_type="int8")
+        self.whisper = WhisperModel("tiny", device="cpu", compute_type="int8",
+                                    cpu_threads=os.cpu_count() or 4, num_workers=1)
         print("[AudioInput] ✓ Whisper ready")
         
         # MQTT
@@ -193,7 +199,7 @@ class AudioInput:
     def start_recording(self):
         """Start recording for transcription"""
         self.recording = True
-        self.recording_buffer = []
+        self.recording_filled = 0
         self.silence_start = None
         self.recording_start_time = time.time()
         print(f"[{ts()}] [AudioInput] 🎙️ Recording started (VAD-based)...")
@@ -203,8 +209,12 @@ class AudioInput:
         if not self.recording:
             return
         
-        # Add to recording buffer
-        self.recording_buffer.append(audio_chunk.copy())
+        # Copy into the preallocated buffer (max-time check below stops us
+        # before it can fill)
+        end = self.recording_filled + len(audio_chunk)
+        if end <= self.recording_max_samples:
+            self.recording_buffer[self.recording_filled:end] = audio_chunk
+            self.recording_filled = end
         
         # Check for silence (VAD)
         volume = np.abs(audio_chunk).mean()
@@ -239,25 +249,32 @@ class AudioInput:
         duration = time.time() - self.recording_start_time
         print(f"\n[{ts()}] [AudioInput] ✓ Recording stopped ({reason}): {duration:.1f}s")
         
-        # Convert recording buffer to audio array
-        if not self.recording_buffer:
+        # View over the filled part of the preallocated buffer - no concat
+        if self.recording_filled == 0:
             print(f"[{ts()}] [AudioInput] ❌ No audio recorded")
             self.session_state = "idle"
             return
+
+        audio_48k = self.recording_buffer[:self.recording_filled]
         
-        audio_48k = np.concatenate(self.recording_buffer)
-        
-        # Resample to 16kHz for Whisper
-        audio_16k = scipy_signal.resample_poly(audio_48k, self.whisper_rate, self.mic_rate)
-        audio_16k = audio_16k.astype(np.float32) / 32768.0  # Normalize to [-1, 1]
+        # Resample to 16kHz for Whisper. Normalize to [-1, 1] float32 first
+        # so the polyphase filter runs in float32 - resampling the int16
+        # directly would go through a float64 intermediate twice the size
+        audio_f32 = audio_48k.astype(np.float32) * (1.0 / 32768.0)
+        audio_16k = scipy_signal.resample_poly(audio_f32, self.whisper_rate, self.mic_rate)
         
         # Transcribe
         print(f"[{ts()}] [AudioInput] ⚡ Transcribing...")
         start = time.time()
         
-        segments, info = self.whisper.transcribe(audio_16k, beam_size=1, language="en", vad_filter=True)
-        text_parts = [seg.text.strip() for seg in segments]
-        text = " ".join(text_parts).strip()
+        # No vad_filter - our own silence-based VAD already endpointed this
+        # take, so running Silero over it again is a duplicated forward pass
+        segments, info = self.whisper.transcribe(
+            audio_16k, beam_size=1, language="en",
+            condition_on_previous_text=False, without_timestamps=True,
+            word_timestamps=False, temperature=0.0)
+        # Generator keeps faster-whisper's lazy decode pipelined - no list
+        text = " ".join(seg.text.strip() for seg in segments).strip()
         
         elapsed = time.time() - start
         
@@ -4,25 +4,35 @@ LLM Client - GPT-5 nano integration for Q&A
 Subscribes to llm/request, sends to OpenAI, publishes llm/response
 """
 
-import paho.mqtt.client as mqtt
-import yaml
 import os
 import time
 import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from dotenv import load_dotenv
-from openai import OpenAI
 
-def ts():
-    """Timestamp for logs"""
-    return datetime.now().strftime("%H:%M:%S.%f")[:-3]
+# Heavy third-party imports (openai pulls in httpx/pydantic/anyio, paho and
+# yaml add their own chains) are deferred to __init__ to keep process
+# cold-start fast on Pi-class hardware.
+
+# Lazy %-style formatting means per-turn debug lines cost nothing when the
+# level is INFO (set LLM_LOG_LEVEL=DEBUG to see the full request trace)
+logging.basicConfig(format="%(asctime)s.%(msecs)03d [%(name)s] %(message)s", datefmt="%H:%M:%S")
+log = logging.getLogger("llm_client")
+log.setLevel(os.getenv("LLM_LOG_LEVEL", "INFO"))
 
 class LLMClient:
     def __init__(self):
+        import yaml
+        import paho.mqtt.client as mqtt
+        from dotenv import load_dotenv
+        from openai import OpenAI
+
         # Load environment variables
         load_dotenv()
-        
+
         # Load MQTT config
         with open('config/mqtt.yaml', 'r') as f:
             mqtt_config = yaml.safe_load(f)
@@ -97,35 +107,59 @@ power the cars and rockets he loves, and encourage him to keep creating, learnin
         self.mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="llm_client")
         self.mqtt_client.on_connect = self.on_connect
         self.mqtt_client.on_message = self.on_message
-        
-        print(f"[{ts()}] [LLMClient] Initialized with model: {self.model}")
+
+        # LLM requests run on a worker pool so the MQTT network thread keeps
+        # servicing messages (e.g. cancel/idle) while OpenAI is thinking
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        self._inflight = None
+        self._cancel_event = threading.Event()
+        self._stop = threading.Event()
+
+        log.info("Initialized with model: %s", self.model)
     
     def on_connect(self, client, userdata, flags, rc, properties=None):
-        print(f"[{ts()}] [LLMClient] Connected to MQTT broker (rc={rc})")
+        log.info("Connected to MQTT broker (rc=%s)", rc)
         client.subscribe(self.topics['llm']['request'])
         client.subscribe(self.topics['session']['state'])
     
     def on_message(self, client, userdata, msg):
         topic = msg.topic
-        payload = msg.payload.decode('utf-8')
-        
-        # Clear history when session returns to IDLE
+
+        # Clear history when session returns to IDLE - fixed literal,
+        # compared as raw bytes so the state firehose costs no decode
         if topic == self.topics['session']['state']:
-            if payload == "idle":
+            if msg.payload == b"idle":
+                # Abandon any in-flight request - nobody is listening anymore
+                if self._inflight is not None and not self._inflight.done():
+                    log.info("Session ended, cancelling in-flight request")
+                    self._cancel_event.set()
+                    self._inflight.cancel()
                 if self.recent_qa:
-                    print(f"[{ts()}] [LLMClient] Session ended, saving and clearing memory")
+                    log.info("Session ended, saving and clearing memory")
                     self.save_memory()
                     # Don't clear - keep persistent across sessions
-        
-        # Handle LLM request
+
+        # Handle LLM request - user content, the one payload worth decoding
         elif topic == self.topics['llm']['request']:
+            payload = msg.payload.decode('utf-8')
             if payload.strip():
-                print(f"[{ts()}] [LLMClient] Question: {payload}")
-                response = self.get_response(payload)
-                
-                # CRITICAL: Publish response IMMEDIATELY (before logging)
-                self.mqtt_client.publish(self.topics['llm']['response'], response)
-                print(f"[{ts()}] [LLMClient] Response published: {response[:80]}...")
+                # Dispatch to the worker pool - the blocking OpenAI call must
+                # not run on the paho network thread
+                self._cancel_event.clear()
+                self._inflight = self._executor.submit(self.handle_request, payload)
+
+    def handle_request(self, payload):
+        """Worker-thread entry: call the LLM and publish the response"""
+        log.info("Question: %s", payload)
+        response = self.get_response(payload)
+
+        if self._cancel_event.is_set():
+            log.info("Response discarded (session went idle)")
+            return
+
+        # CRITICAL: Publish response IMMEDIATELY (before logging)
+        self.mqtt_client.publish(self.topics['llm']['response'], response)
+        log.info("Response published: %.80s...", response)
     
     def load_memory(self):
         """Load conversation memory from persistent storage"""
@@ -134,9 +168,9 @@ power the cars and rockets he loves, and encourage him to keep creating, learnin
                 with open(self.memory_file, 'r') as f:
                     data = json.load(f)
                     self.recent_qa = data.get('recent_qa', [])
-                    print(f"[{ts()}] [LLMClient] Loaded {len(self.recent_qa)} exchanges from memory")
+                    log.info("Loaded %d exchanges from memory", len(self.recent_qa))
             except Exception as e:
-                print(f"[{ts()}] [LLMClient] Error loading memory: {e}")
+                log.error("Error loading memory: %s", e)
                 self.recent_qa = []
         else:
             self.recent_qa = []
@@ -151,7 +185,7 @@ power the cars and rockets he loves, and encourage him to keep creating, learnin
             with open(self.memory_file, 'w') as f:
                 json.dump(data, f, indent=2)
         except Exception as e:
-            print(f"[{ts()}] [LLMClient] Error saving memory: {e}")
+            log.error("Error saving memory: %s", e)
     
     def rotate_memory(self):
         """Rotate memory when it exceeds limits"""
@@ -161,7 +195,7 @@ power the cars and rockets he loves, and encourage him to keep creating, learnin
         if total_exchanges > max_total:
             # Keep only the most recent exchanges
             self.recent_qa = self.recent_qa[-max_total:]
-            print(f"[{ts()}] [LLMClient] Rotated memory, keeping last {max_total} exchanges")
+            log.debug("Rotated memory, keeping last %d exchanges", max_total)
     
     def build_context_messages(self):
         """Build graduated memory context for LLM"""
@@ -230,10 +264,10 @@ power the cars and rockets he loves, and encourage him to keep creating, learnin
             
             # Debug: Show what's being sent
             num_recent_qa = len([m for m in context_messages if m['role'] == 'user'])
-            print(f"[{ts()}] [LLMClient] Context: {num_recent_qa} previous exchanges included")
+            log.debug("Context: %d previous exchanges included", num_recent_qa)
             
             # Call OpenAI Chat Completion
-            print(f"[{ts()}] [LLMClient] Calling {self.model}...")
+            log.debug("Calling %s...", self.model)
             start_time = time.time()
             
             completion = self.client.chat.completions.create(
@@ -244,14 +278,14 @@ power the cars and rockets he loves, and encourage him to keep creating, learnin
             )
             
             elapsed = time.time() - start_time
-            print(f"[{ts()}] [LLMClient] Response received in {elapsed:.2f}s")
+            log.debug("Response received in %.2fs", elapsed)
             
             # Extract response
             assistant_message = completion.choices[0].message.content
             
             # Check if response is empty
             if not assistant_message or not assistant_message.strip():
-                print(f"[{ts()}] [LLMClient] WARNING: Empty response")
+                log.warning("Empty response from model")
                 assistant_message = "I'm not sure how to answer that. Can you ask in a different way?"
             
             # Clean markdown formatting for TTS
@@ -269,7 +303,7 @@ power the cars and rockets he loves, and encourage him to keep creating, learnin
             
         except Exception as e:
             error_msg = f"Sorry, I had trouble thinking of an answer."
-            print(f"[{ts()}] [LLMClient] Error: {e}")
+            log.error("Error: %s", e)
             return error_msg
         finally:
             # Do memory rotation and save in background (non-blocking)
@@ -281,8 +315,10 @@ power the cars and rockets he loves, and encourage him to keep creating, learnin
     
     def start(self):
         """Start the LLM client"""
-        print(f"[{ts()}] [LLMClient] Starting...")
-        
+        import yaml
+
+        log.info("Starting...")
+
         # Connect MQTT
         with open('config/mqtt.yaml', 'r') as f:
             mqtt_config = yaml.safe_load(f)
@@ -290,14 +326,21 @@ power the cars and rockets he loves, and encourage him to keep creating, learnin
         port = mqtt_config['mqtt']['port']
         
         self.mqtt_client.connect(broker, port, 60)
-        
-        print(f"[{ts()}] [LLMClient] Ready to answer questions!")
-        self.mqtt_client.loop_forever()
-    
+
+        log.info("Ready to answer questions!")
+        # loop_start() runs MQTT I/O on a background thread so incoming
+        # messages are still processed while a request is in flight
+        self.mqtt_client.loop_start()
+        self._stop.wait()
+
     def stop(self):
         """Stop the LLM client"""
-        print(f"[{ts()}] [LLMClient] Stopping...")
+        log.info("Stopping...")
+        self._cancel_event.set()
+        self._executor.shutdown(wait=False)
+        self.mqtt_client.loop_stop()
         self.mqtt_client.disconnect()
+        self._stop.set()
 
 if __name__ == "__main__":
     llm = LLMClient()
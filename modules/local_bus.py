@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Local Bus - In-process pub/sub bypass for co-located modules
+When several modules (e.g. SessionManager + LLMClient) run in the same
+process, topic traffic between them doesn't need to round-trip through
+mosquitto. LocalBus delivers payloads directly to in-process subscribers;
+Publisher mirrors every publish to the real broker so external processes
+(GUI, TTS on another host) still see the messages.
+
+Payloads are delivered as bytes to match what paho hands to on_message.
+"""
+
+import threading
+
+class LocalBus:
+    """Minimal in-process topic → callback dispatch table"""
+
+    def __init__(self):
+        self._subs = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic, callback):
+        """Register a callback(payload: bytes) for a topic"""
+        with self._lock:
+            self._subs.setdefault(topic, []).append(callback)
+
+    def publish(self, topic, payload):
+        """Deliver payload to local subscribers. Returns True if anyone got it."""
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        with self._lock:
+            callbacks = list(self._subs.get(topic, ()))
+        for cb in callbacks:
+            cb(payload)
+        return bool(callbacks)
+
+class Publisher:
+    """
+    Facade over an MQTT client + LocalBus.
+    publish() dispatches locally (sub-ms, no TCP/broker hop) and mirrors to
+    the broker so cross-process subscribers keep working.
+
+    A topic subscribed through this facade is served in process ONLY: do
+    not also client.subscribe() it on the shared MQTT client, or the
+    broker's echo of the mirrored publish arrives a second time through
+    on_message (wired to llm/request, that would mean two OpenAI calls
+    per question). is_local() lets an on_message handler drop broker
+    copies of locally-served topics defensively.
+    """
+
+    def __init__(self, mqtt_client, bus=None):
+        self.client = mqtt_client
+        self.bus = bus if bus is not None else LocalBus()
+        self._local_topics = set()
+
+    def subscribe(self, topic, callback):
+        """Register an in-process callback; the topic becomes local-only"""
+        self._local_topics.add(topic)
+        self.bus.subscribe(topic, callback)
+
+    def is_local(self, topic):
+        """True if the topic is delivered in process - on_message handlers
+        should ignore broker copies of it."""
+        return topic in self._local_topics
+
+    def publish(self, topic, payload, retain=False):
+        self.bus.publish(topic, payload)
+        # Mirror to the broker for external subscribers (GUI, monitors, ...)
+        return self.client.publish(topic, payload, retain=retain)
+
+# Shared default bus for modules orchestrated in one process
+default_bus = LocalBus()
@@ -5,14 +5,24 @@ Manages: IDLE → ACTIVE → SPEAKING states
 """
 
 import paho.mqtt.client as mqtt
-import yaml
+import re
+import sys
 import time
 import threading
 from enum import Enum
-from datetime import datetime
+
+from _yaml_cache import load_yaml
+
+# Cache the formatted timestamp per wall-clock second - avoids a datetime
+# allocation + strftime on every log line (ts() runs on every event)
+_ts_cache = [0, ""]
 
 def ts():
-    return datetime.now().strftime("%H:%M:%S")
+    s = int(time.time())
+    if s != _ts_cache[0]:
+        _ts_cache[0] = s
+        _ts_cache[1] = time.strftime("%H:%M:%S", time.localtime(s))
+    return _ts_cache[1]
 
 class SessionState(Enum):
     IDLE = "idle"
@@ -20,122 +30,163 @@ class SessionState(Enum):
     SPEAKING = "speaking"
 
 class SessionManager:
+    # State → display emotion, one dict hash instead of an if/elif chain
+    _EMOTION = {
+        SessionState.IDLE: "sleeping",
+        SessionState.ACTIVE: "listening",
+        SessionState.SPEAKING: "talking",
+    }
+
     def __init__(self):
         # Load config
-        with open('config/mqtt.yaml', 'r') as f:
-            mqtt_config = yaml.safe_load(f)
-        with open('config/session.yaml', 'r') as f:
-            session_config = yaml.safe_load(f)
-        
+        mqtt_config = load_yaml('config/mqtt.yaml')
+        session_config = load_yaml('config/session.yaml')
+
         self.mqtt_config = mqtt_config
         self.session_config = session_config
         self.topics = mqtt_config['topics']
         
         # State
         self.state = SessionState.IDLE
-        self.last_activity = time.time()
         self.timeout = session_config['session']['idle_timeout']
         self.goodbye_phrases = session_config['session']['goodbye_phrases']
+        # One compiled alternation scans the payload in a single pass;
+        # IGNORECASE replaces the per-message payload.lower() allocation
+        self.goodbye_re = re.compile(
+            r'\b(?:' + '|'.join(re.escape(p) for p in self.goodbye_phrases) + r')\b',
+            re.IGNORECASE
+        )
         
+        # Topic → handler dispatch table; topics are resolved once here so
+        # on_message never re-descends the nested topics dict. Keys are
+        # interned so their hashes are cached and equality checks against
+        # incoming topics short-circuit on identity where possible.
+        self._dispatch = {sys.intern(topic): handler for topic, handler in (
+            (self.topics['session']['command'], self.handle_command),
+            (self.topics['session']['wake_detected'], self.handle_wake_detected),
+            (self.topics['audio']['transcription'], self.handle_transcription),
+            (self.topics['robot']['speaking'], self.handle_speaking),
+        )}
+
         # MQTT client
         self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="session_manager")
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
         
-        # Timeout checker
-        self.timeout_thread = None
-        self.running = False
+        # Idle-timeout timer - armed while ACTIVE, one wakeup at the deadline
+        # instead of a thread polling every second
+        self._timeout_timer = None
+        self._stop = threading.Event()
+
+        # Last published values - unchanged state/emotion publishes are
+        # skipped (the broker already retains the current value)
+        self._last_state = None
+        self._last_emotion = None
+
+        # Payloads for the fixed state/emotion values, encoded once - paho
+        # UTF-8-encodes str payloads on every publish, bytes go out as-is
+        self._state_bytes = {s: s.value.encode('ascii') for s in SessionState}
+        self._emotion_bytes = {s: e.encode('ascii') for s, e in self._EMOTION.items()}
     
     def on_connect(self, client, userdata, flags, rc, properties=None):
         print(f"[{ts()}] [SessionManager] Connected to MQTT broker (rc={rc})")
-        
-        # Subscribe to relevant topics
-        client.subscribe(self.topics['session']['wake_detected'])
-        client.subscribe(self.topics['session']['command'])
-        client.subscribe(self.topics['audio']['transcription'])
-        client.subscribe(self.topics['robot']['speaking'])
+
+        # Subscribe to every handled topic, plus llm/response for visibility
+        for topic in self._dispatch:
+            client.subscribe(topic)
         client.subscribe(self.topics['llm']['response'])
-        
+
         # Publish initial state
         self.publish_state()
-    
+
     def on_message(self, client, userdata, msg):
-        topic = msg.topic
-        payload = msg.payload.decode('utf-8')
-        
-        # Session command (cancel/reset)
-        if topic == self.topics['session']['command']:
-            if payload == "cancel" or payload == "reset":
-                print(f"[{ts()}] [SessionManager] ⚠️  CANCEL command received! {self.state.value.upper()} → IDLE")
+        # Handlers get the raw bytes; fixed-literal payloads are compared
+        # without decoding, only user content (transcription) is decoded
+        handler = self._dispatch.get(msg.topic)
+        if handler:
+            handler(msg.payload)
+
+    def handle_command(self, raw):
+        """Session command (cancel/reset)"""
+        if raw == b"cancel" or raw == b"reset":
+            print(f"[{ts()}] [SessionManager] ⚠️  CANCEL command received! {self.state.value.upper()} → IDLE")
+            self.set_state(SessionState.IDLE)
+
+    def handle_wake_detected(self, raw):
+        """Wake word detected"""
+        if self.state == SessionState.IDLE:
+            print(f"[{ts()}] [SessionManager] Wake word detected! IDLE → ACTIVE")
+            self.set_state(SessionState.ACTIVE)
+
+    def handle_transcription(self, raw):
+        """User spoke (transcription received)"""
+        if self.state == SessionState.ACTIVE:
+            payload = raw.decode('utf-8')
+            print(f"[{ts()}] [SessionManager] User said: {payload}")
+
+            # Check for goodbye phrases
+            if self.goodbye_re.search(payload):
+                print(f"[{ts()}] [SessionManager] Goodbye detected! ACTIVE → IDLE")
+                self.set_state(SessionState.IDLE)
+            else:
+                # Publish "thinking" state before sending to LLM
+                self.client.publish(self.topics['session']['state'], b"thinking", retain=True)
+                self._last_state = b"thinking"
+
+                # Publish command to LLM and go to SPEAKING state immediately
+                # This prevents microphone from staying active during LLM processing
+                self.client.publish(self.topics['llm']['request'], payload)
+                print(f"[{ts()}] [SessionManager] Transcription sent to LLM. ACTIVE → SPEAKING")
+                self.set_state(SessionState.SPEAKING)
+
+    def handle_speaking(self, raw):
+        """Robot started/stopped speaking"""
+        if raw == b"true":
+            # TTS started - ensure we're in SPEAKING state
+            if self.state != SessionState.SPEAKING:
+                print(f"[{ts()}] [SessionManager] Robot speaking. {self.state.value.upper()} → SPEAKING")
+                self.set_state(SessionState.SPEAKING)
+        elif raw == b"false":
+            # TTS finished - return to IDLE (not ACTIVE to prevent feedback loop)
+            if self.state == SessionState.SPEAKING:
+                print(f"[{ts()}] [SessionManager] Robot finished. SPEAKING → IDLE")
                 self.set_state(SessionState.IDLE)
-        
-        # Wake word detected
-        elif topic == self.topics['session']['wake_detected']:
-            if self.state == SessionState.IDLE:
-                print(f"[{ts()}] [SessionManager] Wake word detected! IDLE → ACTIVE")
-                self.last_activity = time.time()
-                self.set_state(SessionState.ACTIVE)
-        
-        # User spoke (transcription received)
-        elif topic == self.topics['audio']['transcription']:
-            if self.state == SessionState.ACTIVE:
-                print(f"[{ts()}] [SessionManager] User said: {payload}")
-                
-                # Check for goodbye phrases
-                if any(phrase in payload.lower() for phrase in self.goodbye_phrases):
-                    print(f"[{ts()}] [SessionManager] Goodbye detected! ACTIVE → IDLE")
-                    self.set_state(SessionState.IDLE)
-                else:
-                    # Publish "thinking" state before sending to LLM
-                    self.client.publish(self.topics['session']['state'], "thinking", retain=True)
-                    
-                    # Publish command to LLM and go to SPEAKING state immediately
-                    # This prevents microphone from staying active during LLM processing
-                    self.client.publish(self.topics['llm']['request'], payload)
-                    print(f"[{ts()}] [SessionManager] Transcription sent to LLM. ACTIVE → SPEAKING")
-                    self.set_state(SessionState.SPEAKING)
-        
-        # Robot started speaking
-        elif topic == self.topics['robot']['speaking']:
-            if payload == "true":
-                # TTS started - ensure we're in SPEAKING state
-                if self.state != SessionState.SPEAKING:
-                    print(f"[{ts()}] [SessionManager] Robot speaking. {self.state.value.upper()} → SPEAKING")
-                    self.set_state(SessionState.SPEAKING)
-            elif payload == "false":
-                # TTS finished - return to IDLE (not ACTIVE to prevent feedback loop)
-                if self.state == SessionState.SPEAKING:
-                    print(f"[{ts()}] [SessionManager] Robot finished. SPEAKING → IDLE")
-                    self.set_state(SessionState.IDLE)
     
     def set_state(self, new_state):
-        """Change state and publish"""
+        """Change state, (re)arm the idle timeout, and publish"""
         self.state = new_state
+
+        if self._timeout_timer is not None:
+            self._timeout_timer.cancel()
+            self._timeout_timer = None
+        if new_state == SessionState.ACTIVE:
+            self._timeout_timer = threading.Timer(self.timeout, self.on_timeout)
+            self._timeout_timer.daemon = True
+            self._timeout_timer.start()
+
         self.publish_state()
+
+    def on_timeout(self):
+        """Idle timeout fired while ACTIVE - return to IDLE"""
+        if self.state == SessionState.ACTIVE:
+            print(f"[{ts()}] [SessionManager] Timeout ({self.timeout}s). ACTIVE → IDLE")
+            self.set_state(SessionState.IDLE)
     
     def publish_state(self):
-        """Publish current state to MQTT"""
-        self.client.publish(self.topics['session']['state'], self.state.value, retain=True)
-        self.client.publish(self.topics['robot']['emotion'], self.get_emotion(), retain=True)
+        """Publish current state to MQTT (only values that actually changed)"""
+        state = self._state_bytes[self.state]
+        if state != self._last_state:
+            self.client.publish(self.topics['session']['state'], state, retain=True)
+            self._last_state = state
+
+        emotion = self._emotion_bytes[self.state]
+        if emotion != self._last_emotion:
+            self.client.publish(self.topics['robot']['emotion'], emotion, retain=True)
+            self._last_emotion = emotion
     
     def get_emotion(self):
         """Map state to display emotion"""
-        if self.state == SessionState.IDLE:
-            return "sleeping"
-        elif self.state == SessionState.ACTIVE:
-            return "listening"
-        elif self.state == SessionState.SPEAKING:
-            return "talking"
-    
-    def check_timeout(self):
-        """Background thread to check for idle timeout"""
-        while self.running:
-            time.sleep(1)
-            if self.state == SessionState.ACTIVE:
-                idle_time = time.time() - self.last_activity
-                if idle_time > self.timeout:
-                    print(f"[{ts()}] [SessionManager] Timeout ({self.timeout}s). ACTIVE → IDLE")
-                    self.set_state(SessionState.IDLE)
+        return self._EMOTION[self.state]
     
     def start(self):
         """Start the session manager"""
@@ -145,21 +196,22 @@ class SessionManager:
         broker = self.mqtt_config['mqtt']['broker']
         port = self.mqtt_config['mqtt']['port']
         self.client.connect(broker, port, 60)
-        
-        # Start timeout checker
-        self.running = True
-        self.timeout_thread = threading.Thread(target=self.check_timeout, daemon=True)
-        self.timeout_thread.start()
-        
-        # Start MQTT loop
+
+        # Start MQTT loop on paho's network thread; it drains the send queue
+        # continuously, so publishes from other threads (timeout checker)
+        # leave the socket immediately instead of on the next loop iteration
         print(f"[{ts()}] [SessionManager] Ready. State: {self.state.value}")
-        self.client.loop_forever()
-    
+        self.client.loop_start()
+        self._stop.wait()
+
     def stop(self):
         """Stop the session manager"""
         print(f"[{ts()}] [SessionManager] Stopping...")
-        self.running = False
+        if self._timeout_timer is not None:
+            self._timeout_timer.cancel()
+        self.client.loop_stop()
         self.client.disconnect()
+        self._stop.set()
 
 if __name__ == "__main__":
     manager = SessionManager()
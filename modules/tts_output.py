@@ -5,54 +5,95 @@ Subscribes to llm/response and quiz/speak, converts to speech
 """
 
 import paho.mqtt.client as mqtt
-import yaml
-import subprocess
+import alsaaudio
+import json
+import logging
+import os
+import queue
+import threading
 import time
-from datetime import datetime
 
-def ts():
-    """Timestamp for logs"""
-    return datetime.now().strftime("%H:%M:%S.%f")[:-3]
+from piper import PiperVoice
+
+from _yaml_cache import load_yaml
+
+# Deferred %-formatting: filtered-out messages cost one level check, and
+# the handler timestamps lines itself (no per-line strftime in our code)
+logging.basicConfig(format="%(asctime)s.%(msecs)03d [%(name)s] %(message)s", datefmt="%H:%M:%S")
+log = logging.getLogger("tts")
+log.setLevel(os.getenv("TTS_LOG_LEVEL", "INFO"))
 
 class TTSOutput:
     def __init__(self):
         # Load MQTT config
-        with open('config/mqtt.yaml', 'r') as f:
-            mqtt_config = yaml.safe_load(f)
+        mqtt_config = load_yaml('config/mqtt.yaml')
         self.topics = mqtt_config['topics']
-        
+        self.broker = mqtt_config['mqtt']['broker']
+        self.port = mqtt_config['mqtt']['port']
+
         # Load TTS config
-        with open('config/tts.yaml', 'r') as f:
-            tts_config = yaml.safe_load(f)
+        tts_config = load_yaml('config/tts.yaml')
         
         # TTS settings - configurable voice
         voice_name = tts_config.get('voice', 'en_US-lessac-low')
         self.model_path = f"piper_models/{voice_name}.onnx"
         self.config_path = f"piper_models/{voice_name}.onnx.json"
-        self.length_scale = str(tts_config.get('length_scale', 0.75))
+
+        # Optional int8-quantized model (~1.5-2x faster on CPU); generated
+        # offline with onnxruntime quantize_dynamic, shares the FP32 config
+        if tts_config.get('quantized', False):
+            int8_path = f"piper_models/{voice_name}.int8.onnx"
+            if os.path.exists(int8_path):
+                self.model_path = int8_path
+                log.info("Using int8 quantized model")
+            else:
+                log.warning("⚠ quantized: true but %s not found, using FP32", int8_path)
+        self.length_scale = float(tts_config.get('length_scale', 0.75))
         
         # Auto-detect sample rate from model config
-        import json
         with open(self.config_path, 'r') as f:
             model_config = json.load(f)
         self.sample_rate = model_config['audio']['sample_rate']
         
-        print(f"[{ts()}] [TTSOutput] Using voice: {voice_name}")
-        print(f"[{ts()}] [TTSOutput] Sample rate: {self.sample_rate} Hz")
-        print(f"[{ts()}] [TTSOutput] Speed: {self.length_scale}x")
+        log.info("Using voice: %s", voice_name)
+        log.info("Sample rate: %s Hz", self.sample_rate)
+        log.info("Speed: %sx", self.length_scale)
         
         # State
         self.is_speaking = False
-        
+        self._stop = threading.Event()
+
+        # speak() runs on its own worker thread: on_message only enqueues.
+        # Synthesis+playback on paho's network thread would block the very
+        # thread that flushes the speaking-state publish (wait_for_publish
+        # can never succeed from a callback) and starve message handling
+        # for the whole utterance.
+        self._speak_q = queue.Queue(maxsize=4)
+        threading.Thread(target=self._speak_worker, daemon=True).start()
+
+        # In-process Piper voice - the ONNX model is loaded once here, and
+        # speak() streams raw PCM straight to ALSA (no subprocess, no pipe,
+        # no temp WAV on the SD card)
+        self.voice = PiperVoice.load(self.model_path, config_path=self.config_path, use_cuda=False)
+
+        # ALSA device opened once and kept across utterances - no aplay fork,
+        # no kernel pipe copy, no device reopen per speak()
+        self.pcm = alsaaudio.PCM(device='plughw:UACDemoV10,0')
+        self.pcm.setchannels(1)
+        self.pcm.setrate(self.sample_rate)
+        self.pcm.setformat(alsaaudio.PCM_FORMAT_S16_LE)
+        self.period_size = 1024
+        self.pcm.setperiodsize(self.period_size)
+
         # MQTT
         self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="tts_output")
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
         
-        print(f"[{ts()}] [TTSOutput] Initialized with Piper TTS")
+        log.info("Initialized with Piper TTS")
     
     def on_connect(self, client, userdata, flags, rc, properties=None):
-        print(f"[{ts()}] [TTSOutput] Connected to MQTT broker (rc={rc})")
+        log.info("Connected to MQTT broker (rc=%s)", rc)
         client.subscribe(self.topics['llm']['response'])
         client.subscribe(self.topics['quiz']['speak'])
     
@@ -63,117 +104,108 @@ class TTSOutput:
         # Handle LLM response or quiz speech
         if topic in [self.topics['llm']['response'], self.topics['quiz']['speak']]:
             if payload.strip():
-                self.speak(payload)
-    
+                try:
+                    self._speak_q.put_nowait(payload)
+                except queue.Full:
+                    log.warning("Speech queue full, dropping message")
+
+    def _speak_worker(self):
+        """Worker-thread entry: drain queued utterances one at a time"""
+        while True:
+            text = self._speak_q.get()
+            try:
+                self.speak(text)
+            finally:
+                self._speak_q.task_done()
+
     def speak(self, text):
         """Convert text to speech using Piper - OPTIMIZED for low latency"""
         if self.is_speaking:
-            print(f"[{ts()}] [TTSOutput] Already speaking, skipping...")
+            log.info("Already speaking, skipping...")
             return
         
         try:
-            # Set speaking flag and publish IMMEDIATELY
+            # Set speaking flag and publish IMMEDIATELY - block briefly until
+            # the frame is on the wire so subscribers see SPEAKING before we
+            # sink into synthesis, instead of whenever the loop next runs
             self.is_speaking = True
-            self.client.publish(self.topics['robot']['speaking'], "true")
+            info = self.client.publish(self.topics['robot']['speaking'], "true")
+            try:
+                info.wait_for_publish(timeout=0.05)
+            except (ValueError, RuntimeError):
+                pass  # Not connected yet / queue full - don't block speech on it
             
             # Truncate preview for logging
             preview = text[:50] + "..." if len(text) > 50 else text
-            print(f"[{ts()}] [TTSOutput] Speaking: {preview}")
+            log.info("Speaking: %s", preview)
             
             # Measure total time
             start_time = time.time()
-            
-            # OPTIMIZED: Stream Piper output directly to aplay (no intermediate buffer)
-            # This starts playback AS SOON AS first audio is generated
-            piper_cmd = [
-                "piper",
-                "--model", self.model_path,
-                "--config", self.config_path,
-                "--length_scale", self.length_scale,
-                "--output-raw"
-            ]
-            
-            aplay_cmd = [
-                "aplay", 
-                "-D", "plughw:UACDemoV10,0", 
-                "-r", str(self.sample_rate), 
-                "-f", "S16_LE", 
-                "-c", "1"
-            ]
-            
-            # Pipeline: text -> piper -> aplay (streaming)
-            piper_proc = subprocess.Popen(
-                piper_cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            aplay_proc = subprocess.Popen(
-                aplay_cmd,
-                stdin=piper_proc.stdout,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            # Close piper stdout in parent to allow pipe to work
-            piper_proc.stdout.close()
-            
-            # Send text to piper
-            piper_proc.stdin.write(text.encode('utf-8'))
-            piper_proc.stdin.close()
-            
-            # Wait for both processes to complete
-            aplay_proc.wait()
-            piper_proc.wait()
-            
+
+            # Stream raw PCM from the warm in-process model to the open ALSA
+            # device, accumulated into period-aligned writes - Piper's chunk
+            # sizes are arbitrary, and odd-sized writes make ALSA fragment
+            # them and re-arm DMA more often than needed
+            period_bytes = self.period_size * 2  # mono S16_LE
+            accum = bytearray()
+            for audio_bytes in self.voice.synthesize_stream_raw(
+                    text, length_scale=self.length_scale):
+                accum += audio_bytes
+                while len(accum) >= period_bytes:
+                    self.pcm.write(memoryview(accum)[:period_bytes])
+                    del accum[:period_bytes]
+            if accum:
+                # Flush the sub-period tail at end of utterance
+                self.pcm.write(bytes(accum))
+
             total_time = time.time() - start_time
-            print(f"[{ts()}] [TTSOutput] ✓ Complete in {total_time:.2f}s")
+            log.info("✓ Complete in %.2fs", total_time)
             
             # Small pause after speaking
             time.sleep(0.2)
             
         except Exception as e:
-            print(f"[{ts()}] [TTSOutput] Error: {e}")
+            log.error("Error: %s", e)
         
         finally:
             # Clear speaking flag
             self.is_speaking = False
-            self.client.publish(self.topics['robot']['speaking'], "false")
-            print(f"[{ts()}] [TTSOutput] Finished speaking")
+            info = self.client.publish(self.topics['robot']['speaking'], "false")
+            try:
+                info.wait_for_publish(timeout=0.05)
+            except (ValueError, RuntimeError):
+                pass
+            log.info("Finished speaking")
     
     def start(self):
         """Start TTS output module"""
-        print(f"[{ts()}] [TTSOutput] Starting with Piper neural TTS...")
-        
-        # Test piper
-        print(f"[{ts()}] [TTSOutput] Testing Piper...")
-        test_proc = subprocess.run(
-            ["piper", "--model", self.model_path, "--config", self.config_path, "--output-raw"],
-            input=b"TTS module ready",
-            capture_output=True
-        )
+        log.info("Starting with Piper neural TTS...")
         
-        if test_proc.returncode == 0:
-            print(f"[{ts()}] [TTSOutput] ✓ Piper test successful")
-        else:
-            print(f"[{ts()}] [TTSOutput] ⚠ Piper test warning: {test_proc.stderr.decode()}")
+        # Warm up the model - the first synthesis pays one-off ONNX runtime
+        # allocations, so do it here instead of on the first real utterance
+        log.info("Warming up Piper...")
+        try:
+            for _ in self.voice.synthesize_stream_raw("TTS module ready"):
+                pass
+            log.info("✓ Piper warm-up successful")
+        except Exception as e:
+            log.warning("⚠ Piper warm-up warning: %s", e)
         
         # Connect MQTT
-        with open('config/mqtt.yaml', 'r') as f:
-            mqtt_config = yaml.safe_load(f)
-        broker = mqtt_config['mqtt']['broker']
-        port = mqtt_config['mqtt']['port']
-        
-        self.client.connect(broker, port, 60)
-        
-        print(f"[{ts()}] [TTSOutput] Ready to speak!")
-        self.client.loop_forever()
-    
+        self.client.connect(self.broker, self.port, 60)
+
+        # Network I/O on paho's background thread; the speaking-flag
+        # publishes from speak() are sent as soon as they're queued
+        log.info("Ready to speak!")
+        self.client.loop_start()
+        self._stop.wait()
+
     def stop(self):
         """Stop TTS output"""
-        print(f"[{ts()}] [TTSOutput] Stopping...")
+        log.info("Stopping...")
+        self.client.loop_stop()
         self.client.disconnect()
+        self._stop.set()
 
 if __name__ == "__main__":
     tts = TTSOutput()
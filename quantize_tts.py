@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Quantize the configured Piper voice to INT8 (run once).
+
+Writes piper_models/<voice>.int8.onnx next to the FP32 model for the
+voice named in config/tts.yaml. Set quantized: true there and
+tts_output picks the INT8 model up on its next start - it shares the
+FP32 model's .onnx.json config, so nothing else changes.
+"""
+
+import os
+import sys
+
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules'))
+from _yaml_cache import load_yaml
+
+voice = load_yaml('config/tts.yaml').get('voice', 'en_US-lessac-low')
+src = f"piper_models/{voice}.onnx"
+out = f"piper_models/{voice}.int8.onnx"
+
+if not os.path.exists(src):
+    raise SystemExit(f"FP32 model not found: {src}")
+
+print(f"Quantizing {src} -> {out}")
+quantize_dynamic(src, out, weight_type=QuantType.QInt8, per_channel=True)
+print(f"✓ Done ({os.path.getsize(src)} -> {os.path.getsize(out)} bytes)")
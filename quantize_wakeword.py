@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Quantize the hey_jarvis openwakeword model to INT8 (run once).
+
+Writes wakeword_models/hey_jarvis_int8.onnx from the FP32 model shipped
+inside the openwakeword package. wakeword_alone.py picks the INT8 file
+up automatically if it exists - the mel featurizer and embedding model
+stay FP32, so only the classifier head is quantized and scores barely
+move while the matmuls hit the Pi's int8 NEON kernels.
+"""
+
+import os
+import openwakeword
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+OUT_DIR = "wakeword_models"
+OUT_PATH = os.path.join(OUT_DIR, "hey_jarvis_int8.onnx")
+
+src = os.path.join(os.path.dirname(openwakeword.__file__),
+                   "resources", "models", "hey_jarvis_v0.1.onnx")
+if not os.path.exists(src):
+    raise SystemExit(f"FP32 model not found: {src}")
+
+os.makedirs(OUT_DIR, exist_ok=True)
+print(f"Quantizing {src} -> {OUT_PATH}")
+quantize_dynamic(src, OUT_PATH, weight_type=QuantType.QInt8, per_channel=True)
+print(f"✓ Done ({os.path.getsize(src)} -> {os.path.getsize(OUT_PATH)} bytes)")
@@ -5,6 +5,7 @@ Simulates a conversation and shows what gets sent to the LLM
 """
 
 import json
+from itertools import islice
 from pathlib import Path
 
 # Simulate conversation memory
@@ -34,12 +35,13 @@ def show_what_llm_sees():
     
     if older_start < recent_start:
         print("\n📚 TIER 2 - OLDER CONTEXT (questions only):")
-        for i, qa in enumerate(recent_qa[older_start:recent_start], 1):
+        # islice iterates the window in place - no temporary list per call
+        for i, qa in enumerate(islice(recent_qa, older_start, recent_start), 1):
             print(f"   {i}. {qa['q']}")
     
     # Tier 1: Recent Q&A (last 3 full exchanges)
     print("\n💬 TIER 1 - RECENT CONVERSATION (full Q&A):")
-    for i, qa in enumerate(recent_qa[recent_start:], 1):
+    for i, qa in enumerate(islice(recent_qa, recent_start, None), 1):
         print(f"   Q{i}: {qa['q']}")
         print(f"   A{i}: {qa['a'][:60]}...")
         print()
@@ -22,14 +22,50 @@ print("="*80)
 
 test_rates = [8000, 16000, 22050, 32000, 44100, 48000, 96000]
 
-supported = []
-for rate in test_rates:
+def probe_alsa():
+    """Query the hardware's rate range in one device open via ALSA.
+
+    check_input_settings opens and closes the device per rate - on a USB
+    mic that's 7 open/close cycles. One hw-params query reports the full
+    [min, max] range instead.
+    """
+    import re
+    import alsaaudio
+    # MIC_INDEX is a PortAudio index, not an ALSA card number - pull the
+    # card from the "(hw:X,Y)" suffix PortAudio embeds in the device
+    # name, so we probe this mic and not whichever card shares the index
+    m = re.search(r'\(hw:(\d+),\d+\)', device_info['name'])
+    if m is None:
+        raise Exception(f"No ALSA card in device name: {device_info['name']!r}")
+    pcm = alsaaudio.PCM(type=alsaaudio.PCM_CAPTURE, device=f"hw:{m.group(1)}")
     try:
-        sd.check_input_settings(device=MIC_INDEX, samplerate=rate, channels=1)
-        print(f"✓ {rate:6d} Hz - SUPPORTED")
-        supported.append(rate)
-    except Exception as e:
-        print(f"✗ {rate:6d} Hz - NOT SUPPORTED")
+        rates = pcm.info()['rates']
+    finally:
+        pcm.close()
+    rate_min, rate_max = (rates, rates) if isinstance(rates, int) else rates
+    print(f"\nHardware rate range: [{rate_min}, {rate_max}] Hz")
+    return [rate for rate in test_rates if rate_min <= rate <= rate_max]
+
+def probe_portaudio():
+    """Fallback: probe each candidate rate through PortAudio."""
+    supported = []
+    for rate in test_rates:
+        try:
+            sd.check_input_settings(device=MIC_INDEX, samplerate=rate, channels=1)
+            print(f"✓ {rate:6d} Hz - SUPPORTED")
+            supported.append(rate)
+        except Exception:
+            print(f"✗ {rate:6d} Hz - NOT SUPPORTED")
+    return supported
+
+try:
+    supported = probe_alsa()
+    for rate in test_rates:
+        mark = "✓" if rate in supported else "✗"
+        print(f"{mark} {rate:6d} Hz - {'SUPPORTED' if rate in supported else 'NOT SUPPORTED'}")
+except Exception as e:
+    print(f"\nALSA query failed ({e}), probing rates individually...")
+    supported = probe_portaudio()
 
 print("\n" + "="*80)
 print(f"Supported rates: {supported}")
@@ -5,7 +5,7 @@ Verifies MQTT broker is running and can send/receive messages
 """
 
 import paho.mqtt.client as mqtt
-import time
+import threading
 import sys
 
 print("=" * 60)
@@ -13,17 +13,21 @@ print("TEST 1: MQTT Broker Connectivity")
 print("=" * 60)
 
 test_passed = False
-message_received = False
+
+# Event-driven instead of fixed sleeps - the test finishes as soon as the
+# round-trip completes (sub-ms on localhost) rather than after 3s
+connected = threading.Event()
+received = threading.Event()
 
 def on_connect(client, userdata, flags, rc, properties=None):
     print(f"✓ Connected to broker (rc={rc})")
     client.subscribe("test/ping")
+    connected.set()
 
 def on_message(client, userdata, msg):
-    global message_received
     payload = msg.payload.decode('utf-8')
     print(f"✓ Received message: '{payload}' on topic: {msg.topic}")
-    message_received = True
+    received.set()
 
 # Create client
 client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="test_mqtt")
@@ -35,22 +39,21 @@ try:
     print("Connecting to localhost:1883...")
     client.connect("localhost", 1883, 60)
     client.loop_start()
-    
-    time.sleep(1)
-    
+
+    if not connected.wait(5):
+        raise TimeoutError("Broker did not confirm connection within 5s")
+
     # Publish test message
     print("Publishing test message...")
-    client.publish("test/ping", "Hello MQTT!")
-    
-    # Wait for message
-    time.sleep(2)
-    
-    if message_received:
+    client.publish("test/ping", "Hello MQTT!").wait_for_publish(2)
+
+    # Wait for the loopback delivery
+    if received.wait(2):
         print("\n✅ TEST PASSED - MQTT broker is working!")
         test_passed = True
     else:
         print("\n❌ TEST FAILED - No message received")
-    
+
     client.loop_stop()
     client.disconnect()
 
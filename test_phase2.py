@@ -4,41 +4,64 @@ Test Phase 2: End-to-end LLM + TTS integration
 Simulates: wake word → user question → LLM response → TTS playback
 """
 
+import os
 import paho.mqtt.client as mqtt
-import yaml
+import threading
 import time
 import sys
+from collections import defaultdict, deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules'))
+from _yaml_cache import load_yaml
+
+# Parsed once per run (and served from the .json sidecar across runs)
+MQTT_CFG = load_yaml('config/mqtt.yaml')
+
+# Flattened, interned topic constants - no nested dict walk per check, and
+# interning makes equality against incoming topics a pointer compare first
+_topics = MQTT_CFG['topics']
+TOPIC_SESSION_STATE = sys.intern(_topics['session']['state'])
+TOPIC_WAKE_DETECTED = sys.intern(_topics['session']['wake_detected'])
+TOPIC_TRANSCRIPTION = sys.intern(_topics['audio']['transcription'])
+TOPIC_LLM_RESPONSE = sys.intern(_topics['llm']['response'])
+TOPIC_SPEAKING = sys.intern(_topics['robot']['speaking'])
+TOPIC_EMOTION = sys.intern(_topics['robot']['emotion'])
 
 class Phase2Tester:
     def __init__(self):
-        with open('config/mqtt.yaml', 'r') as f:
-            mqtt_config = yaml.safe_load(f)
-        self.topics = mqtt_config['topics']
-        
-        self.messages_received = []
+        # Per-topic (time, payload) deques - checks read by_topic[T][-1]
+        # in O(1) instead of rescanning one flat list on every poll
+        self.by_topic = defaultdict(deque)
+
+        # Arrival events + latest payload per topic - waits wake on the
+        # message callback instead of ticking a 0.5s poll loop
+        self.events = defaultdict(threading.Event)
+        self.latest = {}
         
         self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="phase2_tester")
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
+        # Fire-and-forget test traffic: QoS 0 publishes, no queue cap, and
+        # enough in-flight slots that nothing waits on broker ACKs
+        self.client.max_inflight_messages_set(20)
+        self.client.max_queued_messages_set(0)
         
     def on_connect(self, client, userdata, flags, rc, properties=None):
         print(f"✓ Connected to MQTT broker")
         # Subscribe to all relevant topics
-        client.subscribe(self.topics['session']['state'])
-        client.subscribe(self.topics['llm']['response'])
-        client.subscribe(self.topics['robot']['speaking'])
-        client.subscribe(self.topics['robot']['emotion'])
+        client.subscribe(TOPIC_SESSION_STATE)
+        client.subscribe(TOPIC_LLM_RESPONSE)
+        client.subscribe(TOPIC_SPEAKING)
+        client.subscribe(TOPIC_EMOTION)
         
     def on_message(self, client, userdata, msg):
         topic = msg.topic
         payload = msg.payload.decode('utf-8')
         timestamp = time.time()
         
-        self.messages_received.append({
-            'topic': topic,
-            'payload': payload,
-            'time': timestamp
-        })
+        self.by_topic[topic].append((timestamp, payload))
+        self.latest[topic] = payload
+        self.events[topic].set()
         
         print(f"  [{topic}] = {payload}")
     
@@ -49,10 +72,8 @@ class Phase2Tester:
         print("="*60)
         
         # Connect
-        with open('config/mqtt.yaml', 'r') as f:
-            mqtt_config = yaml.safe_load(f)
-        broker = mqtt_config['mqtt']['broker']
-        port = mqtt_config['mqtt']['port']
+        broker = MQTT_CFG['mqtt']['broker']
+        port = MQTT_CFG['mqtt']['port']
         
         self.client.connect(broker, port, 60)
         self.client.loop_start()
@@ -61,12 +82,12 @@ class Phase2Tester:
         
         print("\n--- Test 1: Wake Word Detection ---")
         print("Sending wake word signal...")
-        self.client.publish(self.topics['session']['wake_detected'], "wake_word_detected")
+        self.client.publish(TOPIC_WAKE_DETECTED, "wake_word_detected", qos=0)
         time.sleep(2)
         
         # Check if session went to ACTIVE
-        session_states = [m for m in self.messages_received if m['topic'] == self.topics['session']['state']]
-        if session_states and session_states[-1]['payload'] == 'active':
+        session_states = self.by_topic[TOPIC_SESSION_STATE]
+        if session_states and session_states[-1][1] == 'active':
             print("✓ Session transitioned to ACTIVE")
         else:
             print("✗ Session did not activate")
@@ -74,23 +95,15 @@ class Phase2Tester:
         
         print("\n--- Test 2: User Question → LLM Response ---")
         print("Sending user question: 'What is the capital of France?'")
-        self.client.publish(self.topics['audio']['transcription'], "What is the capital of France?")
+        llm_topic = TOPIC_LLM_RESPONSE
+        self.events[llm_topic].clear()
+        self.client.publish(TOPIC_TRANSCRIPTION, "What is the capital of France?", qos=0)
         
-        # Wait for LLM response
+        # Wait for LLM response - woken by on_message on arrival
         print("Waiting for LLM response (max 10 seconds)...")
-        start_time = time.time()
-        llm_responded = False
-        
-        while time.time() - start_time < 10:
-            llm_responses = [m for m in self.messages_received if m['topic'] == self.topics['llm']['response']]
-            if llm_responses:
-                response_text = llm_responses[-1]['payload']
-                print(f"✓ LLM Response: {response_text[:100]}...")
-                llm_responded = True
-                break
-            time.sleep(0.5)
-        
-        if not llm_responded:
+        if self.events[llm_topic].wait(10):
+            print(f"✓ LLM Response: {self.latest[llm_topic][:100]}...")
+        else:
             print("✗ No LLM response received")
             return False
         
@@ -98,10 +111,10 @@ class Phase2Tester:
         print("Checking robot/speaking flag...")
         time.sleep(1)
         
-        speaking_msgs = [m for m in self.messages_received if m['topic'] == self.topics['robot']['speaking']]
+        speaking_msgs = self.by_topic[TOPIC_SPEAKING]
         if speaking_msgs:
             # Should have seen "true" and "false"
-            speaking_values = [m['payload'] for m in speaking_msgs]
+            speaking_values = [payload for _, payload in speaking_msgs]
             if 'true' in speaking_values:
                 print(f"✓ TTS speaking flag set: {speaking_values}")
             else:
@@ -114,32 +127,29 @@ class Phase2Tester:
         print("\n--- Test 4: Follow-up Question ---")
         print("Sending follow-up: 'Tell me more about Paris'")
         time.sleep(2)  # Wait for TTS to finish
-        self.client.publish(self.topics['audio']['transcription'], "Tell me more about Paris")
-        
-        time.sleep(5)
+        self.events[llm_topic].clear()
+        self.client.publish(TOPIC_TRANSCRIPTION, "Tell me more about Paris", qos=0)
         
-        # Check for second response
-        llm_responses = [m for m in self.messages_received if m['topic'] == self.topics['llm']['response']]
-        if len(llm_responses) >= 2:
-            print(f"✓ Follow-up response: {llm_responses[-1]['payload'][:100]}...")
+        if self.events[llm_topic].wait(10):
+            print(f"✓ Follow-up response: {self.latest[llm_topic][:100]}...")
         else:
             print("⚠ No follow-up response (may still be processing)")
         
         print("\n--- Test 5: Goodbye (Session End) ---")
         print("Sending goodbye phrase...")
-        self.client.publish(self.topics['audio']['transcription'], "goodbye")
+        self.client.publish(TOPIC_TRANSCRIPTION, "goodbye", qos=0)
         time.sleep(2)
         
-        session_states = [m for m in self.messages_received if m['topic'] == self.topics['session']['state']]
-        if session_states and session_states[-1]['payload'] == 'idle':
+        session_states = self.by_topic[TOPIC_SESSION_STATE]
+        if session_states and session_states[-1][1] == 'idle':
             print("✓ Session returned to IDLE after goodbye")
         else:
-            print("⚠ Session state: " + (session_states[-1]['payload'] if session_states else "unknown"))
+            print("⚠ Session state: " + (session_states[-1][1] if session_states else "unknown"))
         
         print("\n" + "="*60)
         print("PHASE 2 TEST COMPLETE")
         print("="*60)
-        print(f"\nTotal messages received: {len(self.messages_received)}")
+        print(f"\nTotal messages received: {sum(len(v) for v in self.by_topic.values())}")
         
         self.client.loop_stop()
         self.client.disconnect()
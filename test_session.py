@@ -5,6 +5,7 @@ Tests: IDLE → ACTIVE → SPEAKING → ACTIVE → IDLE
 """
 
 import paho.mqtt.client as mqtt
+import threading
 import time
 import sys
 
@@ -16,6 +17,21 @@ current_state = None
 test_sequence = []
 expected_sequence = ["active", "speaking", "active", "idle"]  # Don't expect initial idle
 
+# Set on every session/state message so waits wake immediately instead of
+# sleeping a fixed 3s per step
+state_event = threading.Event()
+
+def wait_for_state(expected, timeout=5):
+    """Block until session/state reports `expected` (or timeout)."""
+    deadline = time.time() + timeout
+    while current_state != expected:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return False
+        state_event.clear()
+        state_event.wait(remaining)
+    return True
+
 def on_connect(client, userdata, flags, rc, properties=None):
     print(f"✓ Connected to broker")
     client.subscribe("session/state")
@@ -29,6 +45,7 @@ def on_message(client, userdata, msg):
     if topic == "session/state":
         current_state = payload
         test_sequence.append(payload)
+        state_event.set()
         print(f"  State changed: {payload}")
     elif topic == "robot/emotion":
         print(f"  Emotion: {payload}")
@@ -37,6 +54,9 @@ def on_message(client, userdata, msg):
 client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="test_session")
 client.on_connect = on_connect
 client.on_message = on_message
+# QoS 0 test traffic - no broker ACK round-trips
+client.max_inflight_messages_set(20)
+client.max_queued_messages_set(0)
 
 try:
     print("\n⚠️  Make sure Session Manager is running in another terminal!")
@@ -55,23 +75,23 @@ try:
     
     # Test 1: Wake word → ACTIVE
     print("\n1. Simulating wake word detection...")
-    client.publish("session/wake_detected", "0.95")
-    time.sleep(3)  # Wait longer for state to stabilize
+    client.publish("session/wake_detected", "0.95", qos=0)
+    wait_for_state("active")
     
     # Test 2: Robot starts speaking → SPEAKING
     print("\n2. Simulating robot speaking...")
-    client.publish("robot/speaking", "true")
-    time.sleep(3)  # Wait longer
+    client.publish("robot/speaking", "true", qos=0)
+    wait_for_state("speaking")
     
     # Test 3: Robot stops speaking → ACTIVE
     print("\n3. Simulating robot finished speaking...")
-    client.publish("robot/speaking", "false")
-    time.sleep(3)  # Wait longer
+    client.publish("robot/speaking", "false", qos=0)
+    wait_for_state("active")
     
     # Test 4: User says goodbye → IDLE
     print("\n4. Simulating goodbye phrase...")
-    client.publish("audio/transcription", "Thank you, goodbye!")
-    time.sleep(3)  # Wait longer
+    client.publish("audio/transcription", "Thank you, goodbye!", qos=0)
+    wait_for_state("idle")
     
     client.loop_stop()
     client.disconnect()
@@ -5,6 +5,7 @@ Tests that session returns to IDLE after 30s of inactivity
 """
 
 import paho.mqtt.client as mqtt
+import threading
 import time
 import sys
 
@@ -14,6 +15,7 @@ print("=" * 60)
 
 current_state = None
 state_changes = []
+state_event = threading.Event()
 
 def on_connect(client, userdata, flags, rc, properties=None):
     print(f"✓ Connected to broker")
@@ -25,6 +27,7 @@ def on_message(client, userdata, msg):
         payload = msg.payload.decode('utf-8')
         current_state = payload
         state_changes.append((time.time(), payload))
+        state_event.set()
         print(f"  [{time.strftime('%H:%M:%S')}] State: {payload}")
 
 client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="test_timeout")
@@ -45,7 +48,8 @@ try:
     
     print("\n1. Triggering wake word (IDLE → ACTIVE)...")
     client.publish("session/wake_detected", "0.95")
-    time.sleep(3)  # Wait for state change
+    state_event.clear()
+    state_event.wait(5)
     
     if current_state != "active":
         print("❌ Failed to enter ACTIVE state")
@@ -55,19 +59,22 @@ try:
     print("   (Session should return to IDLE after 30s of inactivity)")
     
     start_time = time.time()
+    deadline = start_time + 35
     timeout_occurred = False
     
-    for i in range(35):
-        time.sleep(1)
+    # Woken by the state callback; the 5s cap just keeps progress printing
+    while time.time() < deadline:
+        state_event.clear()
+        state_event.wait(min(5, max(0, deadline - time.time())))
         elapsed = int(time.time() - start_time)
         
-        if current_state == "idle" and not timeout_occurred:
+        if current_state == "idle":
             timeout_occurred = True
             timeout_time = elapsed
             print(f"\n✓ Timeout occurred after {timeout_time} seconds")
+            break
         
-        if i % 5 == 0:
-            print(f"   ... {elapsed}s elapsed (state: {current_state})")
+        print(f"   ... {elapsed}s elapsed (state: {current_state})")
     
     client.loop_stop()
     client.disconnect()
@@ -38,7 +38,9 @@ else:
 
 # Setup audio stream - EXACTLY like old code
 print(f"\nOpening audio stream...")
-stream = sd.InputStream(
+# RawInputStream hands back PortAudio's own buffer - frombuffer below is
+# a zero-copy int16 view, where InputStream built a fresh ndarray per read
+stream = sd.RawInputStream(
     device=MIC_INDEX,
     samplerate=RATE2,
     dtype='int16',
@@ -59,26 +61,46 @@ THRESHOLD = 0.6
 last_detection = 0
 detection_cooldown = 1.0
 
+# Per-chunk volume as a fused |x| sum - numba vectorizes this to NEON on
+# the Pi with an integer accumulator (no temporary, no float64 upcast);
+# without numba, fall back to np.abs into a reused scratch buffer
+try:
+    from numba import njit
+
+    @njit(cache=True)
+    def mean_abs_i16(x):
+        s = 0
+        for i in range(x.size):
+            v = x[i]
+            s += v if v >= 0 else -v
+        return s / x.size
+except ImportError:
+    def mean_abs_i16(x, _buf=np.empty(CHUNK, np.int16)):
+        return np.abs(x, out=_buf[:x.size]).mean()
+
 try:
     while True:
         # Read audio chunk
-        indata, overflowed = stream.read(CHUNK)
+        raw, overflowed = stream.read(CHUNK)
         
         if overflowed:
             print("⚠ Audio buffer overflow!")
         
-        # Convert to numpy array
-        audio_48k = np.frombuffer(indata, dtype=np.int16)
+        # Zero-copy int16 view over the raw buffer
+        audio_48k = np.frombuffer(raw, dtype=np.int16)
         
-        # Decimate by 3: 48kHz -> 16kHz (EXACT method from old code)
+        # Decimate by 3: 48kHz -> 16kHz. Integer sum of the three strided
+        # views then //3 - same boxcar average as reshape().mean() but in
+        # int32, without the float64 intermediate (24 bytes/sample -> 4)
         trim_len = (len(audio_48k) // 3) * 3
-        audio_16k = audio_48k[:trim_len].reshape(-1, 3).mean(axis=1).astype(np.int16)
+        a = audio_48k[:trim_len].astype(np.int32, copy=False)
+        audio_16k = ((a[0::3] + a[1::3] + a[2::3]) // 3).astype(np.int16)
         
         # Feed to OpenWakeWord
         prediction = owwModel.predict(audio_16k)
         
         # Check volume level
-        volume = np.abs(audio_48k).mean()
+        volume = mean_abs_i16(audio_48k)
         
         # Get hey_jarvis score
         jarvis_score = prediction.get('hey_jarvis', 0.0)
@@ -4,9 +4,11 @@ Wake Word Test - Using OFFICIAL OpenWakeWord settings
 16kHz native, 1280 chunk size (using sounddevice instead of pyaudio)
 """
 
+import os
+import socket
+import struct
 import sounddevice as sd
 import numpy as np
-from openwakeword.model import Model
 from datetime import datetime
 
 def ts():
@@ -17,15 +19,35 @@ RATE = 16000  # Native 16kHz - NO decimation needed!
 CHUNK = 1280  # Official chunk size
 THRESHOLD = 0.6
 
-print(f"[{ts()}] Loading OpenWakeWord model...")
-oww = Model()
-print(f"[{ts()}] ✓ Models loaded: {list(oww.models.keys())}")
+# Score via a running wakeword_server when its socket exists - skips the
+# ~300ms-1s Model() cold start on every test run. Falls back to loading
+# the model in process. Override the socket path with OWW_SOCKET.
+SOCKET_PATH = os.environ.get("OWW_SOCKET", "/tmp/oww.sock")
+server_sock = None
+if os.path.exists(SOCKET_PATH):
+    print(f"[{ts()}] Scoring via wakeword server at {SOCKET_PATH}")
+    server_sock = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    server_sock.connect(SOCKET_PATH)
+
+    def predict_score(audio):
+        server_sock.send(audio.tobytes())
+        return struct.unpack('<f', server_sock.recv(4))[0]
+else:
+    from openwakeword.model import Model
+    print(f"[{ts()}] Loading OpenWakeWord model...")
+    oww = Model()
+    print(f"[{ts()}] ✓ Models loaded: {list(oww.models.keys())}")
+
+    def predict_score(audio):
+        return oww.predict(audio).get('hey_jarvis', 0.0)
+
 print(f"[{ts()}] Detection threshold: {THRESHOLD}")
 print(f"[{ts()}] Using official settings: 16kHz, {CHUNK} samples")
 print()
 
-# Open microphone at 16kHz (NO decimation!)
-mic_stream = sd.InputStream(
+# Open microphone at 16kHz (NO decimation!). RawInputStream returns
+# PortAudio's buffer directly, so the frombuffer view below is zero-copy
+mic_stream = sd.RawInputStream(
     device=None,
     samplerate=RATE,
     dtype='int16',
@@ -37,46 +59,67 @@ print(f"[{ts()}] ✓ Microphone opened. Listening for 'Hey Jarvis'...")
 print(f"[{ts()}] Press Ctrl+C to stop\n")
 print("=" * 80)
 
+# Fused |x| mean - NEON-vectorized integer loop under numba, reused
+# np.abs scratch otherwise
+try:
+    from numba import njit
+
+    @njit(cache=True)
+    def mean_abs_i16(x):
+        s = 0
+        for i in range(x.size):
+            v = x[i]
+            s += v if v >= 0 else -v
+        return s / x.size
+except ImportError:
+    def mean_abs_i16(x, _buf=np.empty(CHUNK, np.int16)):
+        return np.abs(x, out=_buf[:x.size]).mean()
+
+# Fixed ring of 4 chunks - predict() always gets a view into the same
+# preallocated storage instead of a freshly built array every 80ms
+ring = np.empty(CHUNK * 4, np.int16)
+ring_pos = 0
+
 detection_count = 0
 mic_stream.start()
 
 try:
     while True:
-        # Get audio - read exactly CHUNK samples
-        audio_data, overflowed = mic_stream.read(CHUNK)
-        audio_data = np.frombuffer(audio_data, dtype=np.int16)
+        # Get audio - read exactly CHUNK samples into the ring slot
+        raw, overflowed = mic_stream.read(CHUNK)
+        audio_data = ring[ring_pos:ring_pos + CHUNK]
+        audio_data[:] = np.frombuffer(raw, dtype=np.int16)
+        ring_pos = (ring_pos + CHUNK) % ring.size
         
         # Calculate volume
-        volume = np.abs(audio_data).mean()
-        
-        # Feed to OpenWakeWord - NO decimation, already 16kHz!
-        prediction = oww.predict(audio_data)
+        volume = mean_abs_i16(audio_data)
         
+        # Feed to OpenWakeWord (local or via server) - NO decimation,
+        # already 16kHz!
+        score = predict_score(audio_data)
+
         # Show live volume
         if volume > 50:
             print(f"\r[Vol: {volume:6.0f}] ", end='', flush=True)
-        
-        # Check hey_jarvis
-        if 'hey_jarvis' in prediction:
-            score = prediction['hey_jarvis']
-            
-            # Show scores > 0.1
-            if score > 0.1:
-                print(f"\n[{ts()}] 🔍 hey_jarvis: {score:.3f} (vol: {volume:.0f})", end='')
-                
-                if score > THRESHOLD:
-                    print(" ✓ DETECTED!")
-                    detection_count += 1
-                    print(f"[{ts()}] 🔊 WAKE WORD #{detection_count}")
-                    print(f"[{ts()}]    Score: {score:.3f}")
-                    print(f"[{ts()}]    Volume: {volume:.0f}")
-                    print(f"[{ts()}]    Buffer: {list(oww.prediction_buffer['hey_jarvis'])[-5:]}")
-                    print("-" * 80)
-                else:
-                    print(" (below threshold)")
+
+        # Show scores > 0.1
+        if score > 0.1:
+            print(f"\n[{ts()}] 🔍 hey_jarvis: {score:.3f} (vol: {volume:.0f})", end='')
+
+            if score > THRESHOLD:
+                print(" ✓ DETECTED!")
+                detection_count += 1
+                print(f"[{ts()}] 🔊 WAKE WORD #{detection_count}")
+                print(f"[{ts()}]    Score: {score:.3f}")
+                print(f"[{ts()}]    Volume: {volume:.0f}")
+                print("-" * 80)
+            else:
+                print(" (below threshold)")
 
 except KeyboardInterrupt:
     print(f"\n\n[{ts()}] Stopping...")
     mic_stream.stop()
     mic_stream.close()
+    if server_sock is not None:
+        server_sock.close()  # server resets its model for the next client
     print(f"[{ts()}] ✓ Total detections: {detection_count}")
@@ -1,50 +1,83 @@
 #!/usr/bin/env python3
 """
-STANDALONE TRANSCRIPTION SERVICE - SIMPLIFIED (ARECORD VERSION)
-Listens for wake word MQTT trigger, then records using ALSA (arecord) and transcribes.
+STANDALONE TRANSCRIPTION SERVICE - SIMPLIFIED
+Listens for wake word MQTT trigger, then records in-process (sounddevice) and transcribes.
 100% decoupled from wake word detection.
 """
 
-import subprocess
 import os
+import queue
+import struct
+import sys
 import time
 import threading
-import yaml
+import wave
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import paho.mqtt.client as mqtt
+import sounddevice as sd
 from datetime import datetime
 from faster_whisper import WhisperModel
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules'))
+from _yaml_cache import load_yaml
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 # Hardcoded for simplicity/reliability on this specific Pi setup
-# Based on 'arecord -l', we have card 0 and card 3. Previous logic used the second one.
-MIC_DEVICE = "plughw:3,0" 
-RECORDING_DURATION = 10  # Seconds
-TEMP_FILENAME = "/tmp/recording.wav"
+# Card 3 is the USB mic; PortAudio matches this substring against its
+# device names ("... (hw:3,0)").
+MIC_DEVICE = "hw:3,0"
+RECORDING_DURATION = 10  # Seconds (hard cap - endpointing usually stops sooner)
+SAMPLE_RATE = 16000  # Whisper native
+VAD_FRAME = 480  # 30ms @ 16kHz
+SILENCE_THRESHOLD = 300  # same energy gate the main audio module uses
+TRAILING_SILENCE = 1.5  # Seconds of quiet after speech that end the take
 ARCHIVE_DIR = "recordings"
 
 # Ensure recordings directory exists
 os.makedirs(ARCHIVE_DIR, exist_ok=True)
 
+# Archive writes run here so the SD-card I/O overlaps transcription
+archive_pool = ThreadPoolExecutor(max_workers=1)
+
+# Whisper decodes run here so the mic is free again the moment a take
+# ends: the next wake word can start recording while the previous take
+# is still decoding. One worker keeps transcripts in publish order.
+transcribe_pool = ThreadPoolExecutor(max_workers=1)
+
+# Cache the strftime part of the timestamp per wall-clock second - only
+# the millisecond suffix is formatted per log line (same trick as the
+# session manager)
+_ts_cache = [0, ""]
+
 def ts():
     """Timestamp for logs"""
-    return datetime.now().strftime("%H:%M:%S.%f")[:-3]
+    now = time.time()
+    s = int(now)
+    if s != _ts_cache[0]:
+        _ts_cache[0] = s
+        _ts_cache[1] = time.strftime("%H:%M:%S", time.localtime(s))
+    return f"{_ts_cache[1]}.{int((now - s) * 1000):03d}"
 
 # ============================================================================
 # MQTT SETUP
 # ============================================================================
-with open('config/mqtt.yaml', 'r') as f:
-    mqtt_config = yaml.safe_load(f)
+# Cached parse with a .json sidecar - repeat starts skip the YAML parse
+mqtt_config = load_yaml('config/mqtt.yaml')
 
 broker = mqtt_config['mqtt']['broker']
 port = mqtt_config['mqtt']['port']
-topic_wake_detected = mqtt_config['topics']['session']['wake_detected']
-topic_transcription = mqtt_config['topics']['audio']['transcription']
-topic_session_state = mqtt_config['topics']['session']['state']
+# Interned so on_message's topic comparison can short-circuit on identity
+topic_wake_detected = sys.intern(mqtt_config['topics']['session']['wake_detected'])
+topic_transcription = sys.intern(mqtt_config['topics']['audio']['transcription'])
+topic_session_state = sys.intern(mqtt_config['topics']['session']['state'])
 
-wake_word_detected = False
-wake_word_lock = threading.Lock()
+# One-slot queue of wake triggers drained by a dedicated worker thread.
+# on_message only enqueues, so the paho network thread stays free to ACK
+# and ping the broker during the ~10s record + transcription
+work_q = queue.Queue(maxsize=1)
 is_processing = False
 last_wake_time = 0
 
@@ -54,19 +87,29 @@ def on_connect(client, userdata, flags, rc, properties=None):
     print(f"[{ts()}] [TRANSCRIBE] ✓ Subscribed to: {topic_wake_detected}")
 
 def on_message(client, userdata, msg):
-    global wake_word_detected, is_processing, last_wake_time
+    global is_processing, last_wake_time
     
     if msg.topic == topic_wake_detected:
         current_time = time.time()
         if current_time - last_wake_time < 1.0: return # Debounce
         if is_processing: return # Ignore while busy
         
-        score = msg.payload.decode('utf-8')
-        print(f"\n[{ts()}] [TRANSCRIBE] 🔔 Wake word trigger received! (score={score})")
+        # wakeword_alone sends a 4-byte packed float; older services and
+        # the test scripts still send decimal strings, so accept both
+        try:
+            score = float(msg.payload)
+        except ValueError:
+            try:
+                score = struct.unpack('<f', msg.payload)[0]
+            except struct.error:
+                score = 0.0
+        print(f"\n[{ts()}] [TRANSCRIBE] 🔔 Wake word trigger received! (score={score:.3f})")
         
-        with wake_word_lock:
-            wake_word_detected = True
-            last_wake_time = current_time
+        last_wake_time = current_time
+        try:
+            work_q.put_nowait(True)
+        except queue.Full:
+            pass  # A trigger is already pending
 
 client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="transcription_service")
 client.on_connect = on_connect
@@ -78,52 +121,78 @@ client.loop_start()
 # WHISPER MODEL
 # ============================================================================
 print(f"[{ts()}] [TRANSCRIBE] Loading Whisper model...")
-whisper = WhisperModel("tiny", device="cpu", compute_type="int8", num_workers=1)
+# All four cores on one transcription at a time - requests are serial here,
+# so cpu_threads beats queueing parallel workers
+whisper = WhisperModel("tiny", device="cpu", compute_type="int8",
+                       cpu_threads=os.cpu_count() or 4, num_workers=1)
 print(f"[{ts()}] [TRANSCRIBE] ✓ Whisper ready")
 
 # ============================================================================
 # CORE FUNCTIONS
 # ============================================================================
-def record_audio_alsa(filename, duration):
-    """Record using native ALSA 'arecord' command - Most robust method"""
-    print(f"[{ts()}] [TRANSCRIBE] 🎙️  Recording {duration}s via ALSA ({MIC_DEVICE})...")
-    
-    # Give wake word service a split second to release mic if needed
-    time.sleep(0.2)
-    
-    cmd = [
-        "arecord",
-        "-D", MIC_DEVICE,
-        "-f", "S16_LE",     # 16-bit Little Endian
-        "-r", "16000",      # 16kHz (Whisper native)
-        "-c", "1",          # Mono
-        "-d", str(duration),# Duration
-        "-t", "wav",        # WAV format
-        "-q",               # Quiet mode
-        filename
-    ]
-    
+# Long-lived capture stream - opened once at startup, so a wake trigger
+# is just "read the next N samples": no fork/exec, no pipe copy
+print(f"[{ts()}] [TRANSCRIBE] Opening capture stream ({MIC_DEVICE} @ {SAMPLE_RATE}Hz)...")
+stream = sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype='int16', device=MIC_DEVICE)
+stream.start()
+print(f"[{ts()}] [TRANSCRIBE] ✓ Capture stream running")
+
+def record_audio(max_duration):
+    """Record from the persistent stream until the speaker goes quiet.
+
+    30ms frames are collected until speech has been heard and
+    TRAILING_SILENCE seconds of quiet follow it, so a short question
+    doesn't pay for the full fixed-length take; max_duration is the
+    hard cap. Returns the take as an int16 array, or None on failure.
+    """
+    print(f"[{ts()}] [TRANSCRIBE] 🎙️  Recording (up to {max_duration}s, {MIC_DEVICE})...")
+
     try:
-        # Run blocking call - this is what we want
-        subprocess.run(cmd, check=True)
-        
-        # Verify file exists and has size
-        if os.path.exists(filename) and os.path.getsize(filename) > 44:
-            print(f"[{ts()}] [TRANSCRIBE] ✓ Recording complete")
-            return True
-        else:
-            print(f"[{ts()}] [TRANSCRIBE] ❌ Recording failed: File empty or missing")
-            return False
-            
-    except subprocess.CalledProcessError as e:
-        print(f"[{ts()}] [TRANSCRIBE] ❌ arecord failed: {e}")
-        return False
+        # Drop whatever buffered while idle so the take starts now
+        backlog = stream.read_available
+        if backlog:
+            stream.read(backlog)
+
+        max_frames = int(max_duration * SAMPLE_RATE) // VAD_FRAME
+        silence_limit = int(TRAILING_SILENCE * SAMPLE_RATE) // VAD_FRAME
+        frames = []
+        heard_speech = False
+        silent_run = 0
+        for _ in range(max_frames):
+            frame, overflowed = stream.read(VAD_FRAME)
+            if overflowed:
+                print(f"[{ts()}] [TRANSCRIBE] ⚠ Buffer overflow during recording")
+            mono = frame[:, 0].copy()
+            frames.append(mono)
+            if np.abs(mono).mean() > SILENCE_THRESHOLD:
+                heard_speech = True
+                silent_run = 0
+            else:
+                silent_run += 1
+                if heard_speech and silent_run >= silence_limit:
+                    break
+
+        if not heard_speech:
+            print(f"[{ts()}] [TRANSCRIBE] ❌ Recording failed: No speech heard")
+            return None
+        audio = np.concatenate(frames)
+        print(f"[{ts()}] [TRANSCRIBE] ✓ Recording complete ({len(audio) / SAMPLE_RATE:.1f}s)")
+        return audio
+
     except Exception as e:
-        print(f"[{ts()}] [TRANSCRIBE] ❌ Unexpected error: {e}")
-        return False
+        print(f"[{ts()}] [TRANSCRIBE] ❌ Recording error: {e}")
+        return None
+
+def archive_wav(audio, archive_path):
+    """Write the take to a WAV in the archive (runs on the archive pool)."""
+    with wave.open(archive_path, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(audio.tobytes())
 
-def transcribe_file(filename):
-    """Transcribe the WAV file directly"""
+def transcribe_audio(audio):
+    """Transcribe an int16 PCM take directly from memory"""
     # Publish that we're starting transcription
     client.publish(topic_session_state, "transcribing")
     
@@ -131,15 +200,25 @@ def transcribe_file(filename):
     start = time.time()
     
     try:
+        # Short, independent utterances: greedy decode (beam width 5 ran the
+        # decoder ~5x per step for marginal accuracy on short commands), no
+        # cross-utterance conditioning, no timestamp alignment passes
         segments, info = whisper.transcribe(
-            filename,
+            audio.astype(np.float32) * (1.0 / 32768.0),
             language="en",
-            vad_filter=True,
-            vad_parameters=dict(min_silence_duration_ms=500, speech_pad_ms=200),
-            beam_size=5
+            # Takes are already endpointed by the capture-side energy
+            # VAD, so Whisper's Silero pass would just re-scan them
+            vad_filter=False,
+            beam_size=1,
+            best_of=1,
+            condition_on_previous_text=False,
+            without_timestamps=True,
+            word_timestamps=False,
+            temperature=0.0
         )
         
-        text = " ".join([seg.text.strip() for seg in segments]).strip()
+        # Generator keeps faster-whisper's lazy decode pipelined - no list
+        text = " ".join(seg.text.strip() for seg in segments).strip()
         elapsed = time.time() - start
         
         if text:
@@ -158,41 +237,45 @@ def transcribe_file(filename):
 # ============================================================================
 print(f"[{ts()}] [TRANSCRIBE] Ready and waiting...\n")
 
-try:
+def transcribe_and_publish(audio):
+    """Decode a take and publish the transcript (runs on transcribe_pool)."""
+    text = transcribe_audio(audio)
+    if text:
+        client.publish(topic_transcription, text)
+        print(f"[{ts()}] [TRANSCRIBE] ✓ Published to MQTT")
+
+def worker():
+    """Drain wake triggers: record, then hand off to the decode stage."""
+    global is_processing
     while True:
-        should_process = False
-        with wake_word_lock:
-            if wake_word_detected:
-                wake_word_detected = False
-                should_process = True
-                is_processing = True
-        
-        if should_process:
-            try:
-                # 1. Record
-                if record_audio_alsa(TEMP_FILENAME, RECORDING_DURATION):
-                    
-                    # 2. Archive (copy for debugging) - DISABLED FOR PERFORMANCE
-                    # timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    # archive_path = os.path.join(ARCHIVE_DIR, f"question_{timestamp}.wav")
-                    # subprocess.run(["cp", TEMP_FILENAME, archive_path])
-                    # print(f"[{ts()}] [TRANSCRIBE] 💾 Archived: {archive_path}")
-                    
-                    # 3. Transcribe
-                    text = transcribe_file(TEMP_FILENAME)
-                    
-                    # 4. Publish
-                    if text:
-                        client.publish(topic_transcription, text)
-                        print(f"[{ts()}] [TRANSCRIBE] ✓ Published to MQTT")
-                
-                print(f"\n[{ts()}] [TRANSCRIBE] Ready for next wake word...\n")
-                
-            finally:
-                is_processing = False
-        
-        time.sleep(0.1)
+        work_q.get()
+        is_processing = True
+        try:
+            # 1. Record (the only stage that needs the mic)
+            audio = record_audio(RECORDING_DURATION)
+            if audio is not None:
+
+                # 2. Archive (WAV for debugging) - submitted to the
+                # background pool, overlaps with the transcription below
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                archive_path = os.path.join(ARCHIVE_DIR, f"question_{timestamp}.wav")
+                archive_pool.submit(archive_wav, audio, archive_path)
+
+                # 3+4. Transcribe and publish - pipelined on the decode
+                # pool, so the next wake word can start recording while
+                # Whisper is still chewing on this take
+                transcribe_pool.submit(transcribe_and_publish, audio)
+
+            print(f"\n[{ts()}] [TRANSCRIBE] Ready for next wake word...\n")
 
+        finally:
+            is_processing = False
+            work_q.task_done()
+
+threading.Thread(target=worker, daemon=True).start()
+
+try:
+    threading.Event().wait()
 except KeyboardInterrupt:
     print(f"\n[{ts()}] [TRANSCRIBE] Stopping...")
     client.loop_stop()
@@ -2,64 +2,249 @@
 """MINIMAL WAKE WORD DETECTION"""
 import sounddevice as sd
 import numpy as np
+from scipy.signal import firwin, lfilter
 from openwakeword.model import Model
+import json
+import os
 import paho.mqtt.client as mqtt
+import queue
+import struct
 import yaml
+import socket
+import threading
 import time
 import sys
-from datetime import datetime
 
 # Logging
 sys.stdout = open('logs/wakeword.log', 'a', buffering=1)
 sys.stderr = sys.stdout
 
-# Config - Find FIRST USB PnP mic (for wake word detection)
-import sounddevice as sd
-devices = sd.query_devices()
-usb_mics = [(i, dev) for i, dev in enumerate(devices) if 'USB PnP Sound Device' in dev['name'] and dev['max_input_channels'] > 0]
-if len(usb_mics) == 0:
-    raise Exception("No USB PnP microphones found!")
-MIC_DEVICE = usb_mics[0][0]  # First USB PnP mic
-print(f"[WAKEWORD] Using device {MIC_DEVICE}: {usb_mics[0][1]['name']}")
+# Config - Find FIRST USB PnP mic (for wake word detection).
+# The index is cached in data/: a full query_devices() enumerates every
+# PortAudio device and can take hundreds of ms when a USB dongle has to
+# wake up, so repeat starts validate the cached index with one lookup
+# and only rescan if the device moved or vanished.
+DEVICE_CACHE = 'data/wakeword_device.json'
+
+def find_usb_mic():
+    """Full PortAudio scan - first run, or the cached index went stale."""
+    devices = sd.query_devices()
+    usb_mics = [(i, dev) for i, dev in enumerate(devices) if 'USB PnP Sound Device' in dev['name'] and dev['max_input_channels'] > 0]
+    if len(usb_mics) == 0:
+        raise Exception("No USB PnP microphones found!")
+    return usb_mics[0][0], usb_mics[0][1]['name']
+
+MIC_DEVICE = None
+try:
+    with open(DEVICE_CACHE) as f:
+        cached = json.load(f)
+    dev = sd.query_devices(cached['index'])
+    if dev['name'] == cached['name'] and dev['max_input_channels'] > 0:
+        MIC_DEVICE = cached['index']
+except (OSError, ValueError, KeyError, sd.PortAudioError):
+    pass
+
+if MIC_DEVICE is None:
+    MIC_DEVICE, mic_name = find_usb_mic()
+    os.makedirs('data', exist_ok=True)
+    try:
+        with open(DEVICE_CACHE, 'w') as f:
+            json.dump({'index': MIC_DEVICE, 'name': mic_name}, f)
+    except OSError:
+        pass  # Cache is an optimization - scan again next start
+else:
+    mic_name = cached['name']
+print(f"[WAKEWORD] Using device {MIC_DEVICE}: {mic_name}")
 
 MIC_RATE = 48000
 CHUNK_SAMPLES = 2000
 WAKE_THRESHOLD = 0.1
+VOLUME_GATE = 300  # same silence threshold the main audio module uses
 last_detect = 0
 
 # MQTT
 with open('config/mqtt.yaml', 'r') as f:
     mqtt_config = yaml.safe_load(f)
+topic_wake_detected = mqtt_config['topics']['session']['wake_detected']
+
+def on_connect(client, userdata, flags, rc, properties=None):
+    # Nagle batches our tiny score payloads for up to ~40ms; turn it off
+    # so a detection hits the broker immediately
+    try:
+        client.socket().setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except (OSError, AttributeError):
+        pass
+
 client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+client.on_connect = on_connect
+client.max_inflight_messages_set(20)
+client.max_queued_messages_set(0)
 client.connect(mqtt_config['mqtt']['broker'], mqtt_config['mqtt']['port'], 60)
 client.loop_start()
 
-# Model
-oww = Model()
+# Publishes run on their own thread so a congested broker can never
+# stall the capture loop and overflow the mic. put_nowait + small bound:
+# if the queue ever backs up, we drop a detection rather than audio.
+pub_q = queue.Queue(maxsize=32)
+
+def publisher():
+    while True:
+        topic, payload = pub_q.get()
+        client.publish(topic, payload, qos=0)
+        pub_q.task_done()
+
+threading.Thread(target=publisher, daemon=True).start()
+
+# Model - prefer the INT8 classifier if quantize_wakeword.py has been
+# run (featurizer stays FP32 either way, so scores are comparable).
+# openwakeword keys predictions by the model file's basename, so the
+# INT8 model reports under 'hey_jarvis_int8', not 'hey_jarvis'.
+INT8_MODEL = "wakeword_models/hey_jarvis_int8.onnx"
+if os.path.exists(INT8_MODEL):
+    print(f"[WAKEWORD] Using INT8 model: {INT8_MODEL}")
+    oww = Model(wakeword_models=[INT8_MODEL], inference_framework='onnx')
+    WAKE_KEY = os.path.splitext(os.path.basename(INT8_MODEL))[0]
+else:
+    oww = Model()
+    WAKE_KEY = 'hey_jarvis'
+if WAKE_KEY not in oww.models:
+    raise Exception(f"Wake model '{WAKE_KEY}' not loaded (have: {list(oww.models.keys())})")
+
+def tune_ort_sessions(oww_model):
+    """Rebuild openwakeword's ONNX sessions with Pi-friendly options.
+
+    The chunk shape is fixed, so full graph fusion always pays for
+    itself, and capping intra-op threads at 2 keeps ORT from fighting
+    the whisper/TTS services for all four cores. Covers both the
+    classifier heads and the mel/embedding featurizer on the
+    preprocessor, which is where most of the per-chunk compute lives.
+    Quietly a no-op for tflite models or if openwakeword's internals
+    change.
+    """
+    try:
+        import onnxruntime as ort
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        opts.intra_op_num_threads = 2
+        opts.enable_mem_pattern = True
+
+        def rebuild(sess):
+            # InferenceSession exposes no public path accessor; leave
+            # the session untouched if the private one ever goes away
+            path = getattr(sess, '_model_path', None)
+            if path:
+                return ort.InferenceSession(path, sess_options=opts)
+            return sess
+
+        for name, sess in list(oww_model.models.items()):
+            if isinstance(sess, ort.InferenceSession):
+                oww_model.models[name] = rebuild(sess)
+        pre = getattr(oww_model, 'preprocessor', None)
+        for attr in ('melspec_model', 'embedding_model'):
+            sess = getattr(pre, attr, None)
+            if isinstance(sess, ort.InferenceSession):
+                setattr(pre, attr, rebuild(sess))
+    except Exception as e:
+        print(f"[WAKEWORD] ORT session tuning skipped: {e}")
+
+tune_ort_sessions(oww)
 print(f"Listening for 'Hey Jarvis' (threshold={WAKE_THRESHOLD})...")
 
-# Audio stream
-stream = sd.InputStream(device=MIC_DEVICE, samplerate=MIC_RATE, dtype='int16', channels=1, blocksize=CHUNK_SAMPLES)
+# Audio stream - RawInputStream returns PortAudio's own buffer from
+# read(), so wrapping it with np.frombuffer below is zero-copy instead
+# of a fresh 4kB ndarray every ~42ms
+stream = sd.RawInputStream(device=MIC_DEVICE, samplerate=MIC_RATE, dtype='int16', channels=1, blocksize=CHUNK_SAMPLES)
 stream.start()
 
+# Anti-aliased decimation: a boxcar-3 average folds everything above
+# ~8kHz back into the band openwakeword listens to and costs detection
+# score. 31-tap lowpass at Nyquist/3; lfilter state carries across
+# chunks so the stream is filtered seamlessly. Output buffer is reused.
+fir_b = firwin(31, 1.0 / 3)
+fir_zi = np.zeros(fir_b.size - 1)
+dec_out16 = np.empty(CHUNK_SAMPLES // 3, np.int16)
+
+# Fused volume gate (integer loop NEON-vectorizes under numba, chunk
+# fits in L1). A chunk is silent only if every sample is under the gate:
+# mean <= peak, so a whole-chunk peak scan is a sound early-out - the
+# scan breaks at the first loud sample and silence pays one cheap pass.
+# The decimation itself stays on the FIR path above: fusing a boxcar
+# back into the kernel would reintroduce the aliasing 7-5 fixed.
+# Returns 0.0 for chunks that cannot clear the gate.
+try:
+    from numba import njit
+
+    @njit(cache=True)
+    def gate_volume(x, gate):
+        loud = False
+        for i in range(x.size):
+            v = x[i]
+            if v < 0:
+                v = -v
+            if v >= gate:
+                loud = True
+                break
+        if not loud:
+            return 0.0
+        s = 0
+        for i in range(x.size):
+            v = x[i]
+            s += v if v >= 0 else -v
+        return s / x.size
+except ImportError:
+    def gate_volume(x, gate, _buf=np.empty(CHUNK_SAMPLES, np.int16)):
+        a = np.abs(x, out=_buf[:x.size])
+        if a.max() < gate:
+            return 0.0
+        return a.mean()
+
+# Batch two decimated chunks (~83ms) per predict() call. Per-call
+# overhead (tensor setup, session binding) rivals the actual compute on
+# the Pi, so halving the calls buys real headroom for <100ms latency.
+BATCH_CHUNKS = 2
+pending = np.empty(BATCH_CHUNKS * (CHUNK_SAMPLES // 3), np.int16)
+pending_filled = 0
+
 # Main loop
 try:
     while True:
-        # Read audio
-        indata, _ = stream.read(CHUNK_SAMPLES)
-        audio_48k = np.frombuffer(indata, dtype=np.int16)
+        # Read audio (zero-copy view over PortAudio's buffer)
+        raw, _ = stream.read(CHUNK_SAMPLES)
+        audio_48k = np.frombuffer(raw, dtype=np.int16)
         
-        # Decimate to 16kHz
-        trim_len = (len(audio_48k) // 3) * 3
-        audio_16k = audio_48k[:trim_len].reshape(-1, 3).mean(axis=1).astype(np.int16)
-        
-        # Detect
-        prediction = oww.predict(audio_16k)
-        score = prediction.get('hey_jarvis', 0.0)
+        # Volume gate - silence is the common case; the fused kernel
+        # classifies it in one early-terminating peak scan, and silent
+        # chunks skip the filter and the model entirely (same rule as
+        # audio_input_v2)
+        silent = gate_volume(audio_48k, VOLUME_GATE) < VOLUME_GATE
+        if silent and pending_filled == 0:
+            continue
+
+        if not silent:
+            # Decimate to 16kHz: streaming FIR, then every 3rd sample
+            # into the reused int16 buffer, batched until full
+            filtered, fir_zi = lfilter(fir_b, 1.0, audio_48k, zi=fir_zi)
+            dec_out16[:] = filtered[2::3]
+            pending[pending_filled:pending_filled + dec_out16.size] = dec_out16
+            pending_filled += dec_out16.size
+            if pending_filled < pending.size:
+                continue
+
+        # Detect on a full batch - or on the partial one when speech just
+        # went quiet, so an utterance tail is never left waiting
+        prediction = oww.predict(pending[:pending_filled])
+        pending_filled = 0
+        score = prediction.get(WAKE_KEY, 0.0)
         
         if score > WAKE_THRESHOLD and time.time() - last_detect > 1:
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] DETECTED! score={score:.3f}")
-            client.publish(mqtt_config['topics']['session']['wake_detected'], f"{score}")
+            print(f"[{time.strftime('%H:%M:%S')}] DETECTED! score={score:.3f}")
+            # 4-byte packed float - no decimal formatting in the hot
+            # path, fixed-width on the wire, published off-thread
+            try:
+                pub_q.put_nowait((topic_wake_detected, struct.pack('<f', score)))
+            except queue.Full:
+                pass  # broker is wedged - keep capturing
             oww.reset()
             last_detect = time.time()
 
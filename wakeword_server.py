@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+WAKE WORD SERVER - Resident OpenWakeWord model behind a Unix socket
+Model() cold-starts ~300ms-1s on the Pi; every test script and service
+that wants a score pays it again. This server loads the models once and
+scores raw int16 frames sent over /tmp/oww.sock.
+
+Protocol (SOCK_SEQPACKET, one message per chunk):
+  client -> server: 2560 bytes = 1280 int16 samples @ 16kHz
+  server -> client: 4 bytes   = little-endian float32 hey_jarvis score
+The model's rolling buffer is reset when a client disconnects, so each
+connection sees a fresh detector.
+"""
+
+import os
+import socket
+import struct
+import numpy as np
+from datetime import datetime
+from openwakeword.model import Model
+
+SOCKET_PATH = "/tmp/oww.sock"
+CHUNK = 1280  # official OpenWakeWord chunk @ 16kHz
+FRAME_BYTES = CHUNK * 2
+
+def ts():
+    """Timestamp for logs"""
+    return datetime.now().strftime("%H:%M:%S.%f")[:-3]
+
+print(f"[{ts()}] [OWW-SERVER] Loading OpenWakeWord models...")
+oww = Model()
+print(f"[{ts()}] [OWW-SERVER] ✓ Models loaded: {list(oww.models.keys())}")
+
+if os.path.exists(SOCKET_PATH):
+    os.unlink(SOCKET_PATH)
+
+server = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+server.bind(SOCKET_PATH)
+server.listen(1)
+print(f"[{ts()}] [OWW-SERVER] Listening on {SOCKET_PATH}")
+
+try:
+    while True:
+        conn, _ = server.accept()
+        print(f"[{ts()}] [OWW-SERVER] Client connected")
+        try:
+            while True:
+                data = conn.recv(FRAME_BYTES)
+                if not data:
+                    break
+                if len(data) != FRAME_BYTES:
+                    continue  # partial/garbled frame - skip, stay in sync
+                audio = np.frombuffer(data, dtype=np.int16)
+                prediction = oww.predict(audio)
+                score = prediction.get('hey_jarvis', 0.0)
+                conn.send(struct.pack('<f', score))
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            conn.close()
+            # Fresh rolling buffer for the next client
+            oww.reset()
+            print(f"[{ts()}] [OWW-SERVER] Client disconnected, model reset")
+
+except KeyboardInterrupt:
+    print(f"\n[{ts()}] [OWW-SERVER] Stopping...")
+finally:
+    server.close()
+    if os.path.exists(SOCKET_PATH):
+        os.unlink(SOCKET_PATH)